@@ -1,23 +1,35 @@
 import streamlit as st
-import chromadb
-from openai import AzureOpenAI
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import os
 from dotenv import load_dotenv
-import pandas as pd
-from datetime import datetime, time
-import json
+import time
+import uuid
+import math
 import warnings
 import base64
+import codecs
 import re
 import io
 import soundfile as sf
 from scipy.io.wavfile import write
 import numpy as np
+import msgspec
+from typing import Annotated, Union
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
 
-# Suppress ChromaDB telemetry warnings
-warnings.filterwarnings("ignore", category=UserWarning)
-warnings.filterwarnings("ignore", message=".*telemetry.*")
-warnings.filterwarnings("ignore", message=".*config file.*")
+# One-time process setup (Streamlit re-executes the module top-level on every rerun)
+@st.cache_resource(show_spinner=False)
+def _bootstrap():
+    # Load environment variables
+    load_dotenv()
+    
+    # Suppress ChromaDB telemetry warnings
+    warnings.filterwarnings("ignore", category=UserWarning)
+    warnings.filterwarnings("ignore", message=".*telemetry.*")
+    warnings.filterwarnings("ignore", message=".*config file.*")
+    return True
 
 # Initialize TTS model (cached for performance)
 @st.cache_resource
@@ -81,9 +93,6 @@ def generate_tts_audio(text, language="en"):
         st.error(f"TTS generation failed: {str(e)}")
         return None
 
-# Load environment variables
-load_dotenv()
-
 def create_tts_component(text, button_id, language="en"):
     """Create a TTS component with Hugging Face model and language selection"""
     # Language options with Vietnamese support
@@ -125,33 +134,131 @@ def create_tts_component(text, button_id, language="en"):
                 else:
                     st.error("❌ Failed to generate audio")
 
+# HNSW index parameters for the films collection, sized for catalogs under ~100k films
+HNSW_PARAMS = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 128,
+    "hnsw:search_ef": 64,
+    "hnsw:num_threads": os.cpu_count() or 1
+}
+
+# Azure embedding requests: inputs per request and requests in flight at once
+EMBEDDING_BATCH_SIZE = 16
+EMBEDDING_MAX_CONCURRENCY = 8
+
+class AzureOpenAIEmbeddingFunction:
+    """ChromaDB embedding function backed by an Azure OpenAI embeddings deployment
+
+    Inputs are split into batches of EMBEDDING_BATCH_SIZE and embedded concurrently;
+    rate-limited requests are retried with exponential backoff.
+    """
+    def __init__(self, api_key, endpoint, api_version, deployment_name):
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.api_version = api_version
+        self.deployment_name = deployment_name
+    
+    def __call__(self, input):
+        return asyncio.run(self._embed_all(list(input)))
+    
+    async def _embed_all(self, texts):
+        from openai import AsyncAzureOpenAI
+        
+        chunks = [texts[i:i + EMBEDDING_BATCH_SIZE] for i in range(0, len(texts), EMBEDDING_BATCH_SIZE)]
+        semaphore = asyncio.Semaphore(EMBEDDING_MAX_CONCURRENCY)
+        
+        # A fresh client per call: asyncio.run gives each call its own event loop
+        async with AsyncAzureOpenAI(
+            api_key=self.api_key,
+            api_version=self.api_version,
+            azure_endpoint=self.endpoint
+        ) as aclient:
+            results = await asyncio.gather(
+                *(self._embed_chunk(aclient, semaphore, chunk) for chunk in chunks)
+            )
+        
+        # gather preserves chunk order, so flattening restores input order
+        return [embedding for chunk_embeddings in results for embedding in chunk_embeddings]
+    
+    async def _embed_chunk(self, aclient, semaphore, chunk):
+        from openai import RateLimitError
+        
+        async with semaphore:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_exception_type(RateLimitError),
+                wait=wait_exponential(multiplier=1, min=1, max=30),
+                stop=stop_after_attempt(5),
+                reraise=True
+            ):
+                with attempt:
+                    response = await aclient.embeddings.create(model=self.deployment_name, input=chunk)
+        
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+def init_embedding_function():
+    """Use Azure OpenAI embeddings if a deployment is configured, else ChromaDB's default"""
+    deployment_name = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
+    if not deployment_name:
+        return None
+    
+    return AzureOpenAIEmbeddingFunction(
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+        deployment_name=deployment_name
+    )
+
 # Initialize ChromaDB
 @st.cache_resource
 def init_chromadb():
+    # Imported lazily: chromadb pulls in heavy dependencies we don't want on cold start
+    import chromadb
+    
     client = chromadb.PersistentClient(path="./chroma_db")
-    collection = client.get_or_create_collection(
-        name="films",
-        metadata={"hnsw:space": "cosine"}
-    )
+    
+    # Note: ChromaDB's HNSW index always stores float32 vectors; quantizing embeddings before
+    # insertion would lose precision without shrinking the index, so none is applied here.
+    # HNSW parameters are fixed once the collection exists, so only pass them on first creation
+    # (list_collections returns names on newer ChromaDB versions and Collection objects on older ones)
+    existing = {getattr(c, "name", c) for c in client.list_collections()}
+    collection_kwargs = {}
+    embedding_function = init_embedding_function()
+    if embedding_function is not None:
+        collection_kwargs["embedding_function"] = embedding_function
+    
+    if "films" in existing:
+        collection = client.get_collection(name="films", **collection_kwargs)
+    else:
+        collection = client.create_collection(
+            name="films",
+            metadata=HNSW_PARAMS,
+            **collection_kwargs
+        )
     return client, collection
 
+def azure_openai_client_kwargs():
+    """Azure OpenAI client settings from the environment"""
+    return {
+        "api_key": os.getenv("AZURE_OPENAI_API_KEY"),
+        "api_version": os.getenv("AZURE_OPENAI_API_VERSION"),
+        "azure_endpoint": os.getenv("AZURE_OPENAI_ENDPOINT")
+    }
+
 # Initialize Azure OpenAI
 def init_azure_openai():
-    api_key = os.getenv("AZURE_OPENAI_API_KEY")
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-    api_version = os.getenv("AZURE_OPENAI_API_VERSION")
+    # Imported lazily so pages without chat never load the OpenAI client stack
+    from openai import AzureOpenAI
+    
+    client_kwargs = azure_openai_client_kwargs()
     deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
     
-    if not all([api_key, endpoint, api_version, deployment_name]):
+    if not all([*client_kwargs.values(), deployment_name]):
         st.error("Please set all Azure OpenAI configuration in the .env file")
         return None, None
     
     try:
-        client = AzureOpenAI(
-            api_key=api_key,
-            api_version=api_version,
-            azure_endpoint=endpoint
-        )
+        client = AzureOpenAI(**client_kwargs)
         return client, deployment_name
     except TypeError as e:
         if "proxies" in str(e):
@@ -160,8 +267,58 @@ def init_azure_openai():
             st.error(f"Error initializing Azure OpenAI client: {str(e)}")
         return None, None
 
-def add_film_to_db(collection, title, genre, director, year, description, timeslot, rating):
-    """Add a film to ChromaDB"""
+# Chat history bounds: messages kept in session state, and messages rendered in full
+MAX_HISTORY_MESSAGES = 50
+VISIBLE_MESSAGES = 20
+
+# Rolling chat summary: token budget before older turns are summarized, and messages kept verbatim (two turns)
+SUMMARY_TOKEN_THRESHOLD = 2000
+SUMMARY_KEEP_MESSAGES = 4
+
+# Films per collection.add call during JSON imports
+IMPORT_BATCH_SIZE = 100
+
+# Rows per page on the View All Films page
+PAGE_SIZE = 100
+
+FILM_GENRES = [
+    "Action", "Adventure", "Animation", "Comedy", "Crime", 
+    "Documentary", "Drama", "Family", "Fantasy", "Horror", 
+    "Musical", "Mystery", "Romance", "Sci-Fi", "Thriller", "War", "Western"
+]
+
+# Lowercase genre spellings mapped to their canonical FILM_GENRES name
+_GENRE_ALIASES = {**{g.lower(): g for g in FILM_GENRES}, "sci fi": "Sci-Fi", "scifi": "Sci-Fi"}
+_REQUIRED_FILM_FIELDS = frozenset({"title", "genre", "director", "year", "description"})
+
+# Column order used when rendering film tables
+FILM_COLUMNS = ["title", "genre", "director", "year", "description", "timeslot", "rating"]
+
+def film_rows(films):
+    """Project film dicts onto FILM_COLUMNS for st.dataframe (non-dict rows are skipped)"""
+    return [{col: film.get(col) for col in FILM_COLUMNS} for film in films if isinstance(film, dict)]
+
+class Film(msgspec.Struct):
+    """Schema for a film entry in a JSON import"""
+    title: str
+    genre: str
+    director: str
+    year: Annotated[int, msgspec.Meta(ge=1900, le=2024)]
+    description: str
+    timeslot: str = "All Day"
+    # int and float kept apart so integer ratings are stored as given (9, not 9.0)
+    rating: Union[Annotated[int, msgspec.Meta(ge=1, le=10)], Annotated[float, msgspec.Meta(ge=1, le=10)]] = 7
+
+def decode_json(data):
+    """Decode JSON text or bytes with msgspec, ignoring a leading UTF-8 BOM"""
+    if isinstance(data, bytes):
+        data = data.removeprefix(codecs.BOM_UTF8)
+    else:
+        data = data.removeprefix("\ufeff")
+    return msgspec.json.decode(data)
+
+def build_film_record(title, genre, director, year, description, timeslot, rating, id_prefix=None):
+    """Build the (document, metadata, id) triple stored in ChromaDB for a film"""
     film_data = {
         "title": title,
         "genre": genre,
@@ -175,8 +332,16 @@ def add_film_to_db(collection, title, genre, director, year, description, timesl
     # Create a comprehensive text for embedding
     film_text = f"Title: {title}. Genre: {genre}. Director: {director}. Year: {year}. Description: {description}. Rating: {rating}/10"
     
-    # Generate a unique ID
-    film_id = f"{title}_{year}_{datetime.now().timestamp()}"
+    # Generate a unique ID (batch imports pass a precomputed prefix instead of a random suffix)
+    film_id = f"{title}_{year}_{id_prefix or uuid.uuid4().hex[:12]}"
+    
+    return film_text, film_data, film_id
+
+def add_film_to_db(collection, title, genre, director, year, description, timeslot, rating):
+    """Add a film to ChromaDB"""
+    film_text, film_data, film_id = build_film_record(
+        title, genre, director, year, description, timeslot, rating
+    )
     
     try:
         collection.add(
@@ -189,111 +354,334 @@ def add_film_to_db(collection, title, genre, director, year, description, timesl
         st.error(f"Error adding film to database: {str(e)}")
         return False
 
-def import_films_from_json(collection, json_data):
-    """Import multiple films from JSON data"""
-    success_count = 0
+def import_films_from_json(collection, json_data, progress=None):
+    """Import multiple films from JSON data
+
+    If given, `progress` is a dict whose "done"/"total" counts are updated as valid films are saved,
+    so a background import can be reported from the UI thread.
+    """
     error_count = 0
     errors = []
+    docs, metas, ids = [], [], []
     
     try:
-        films = json.loads(json_data) if isinstance(json_data, str) else json_data
+        films = decode_json(json_data) if isinstance(json_data, (str, bytes)) else json_data
         
         if not isinstance(films, list):
             return False, "JSON must contain an array of films"
         
+        # One timestamp per batch; the row index keeps IDs unique within it
+        batch_base = time.time_ns()
+        
         for i, film in enumerate(films):
             try:
+                if not isinstance(film, dict):
+                    error_count += 1
+                    errors.append(f"Film {i+1}: Must be a JSON object")
+                    continue
+                
                 # Validate required fields
-                required_fields = ['title', 'genre', 'director', 'year', 'description']
-                missing_fields = [field for field in required_fields if field not in film]
+                missing_fields = _REQUIRED_FILM_FIELDS - film.keys()
                 
                 if missing_fields:
                     error_count += 1
-                    errors.append(f"Film {i+1}: Missing fields: {', '.join(missing_fields)}")
+                    errors.append(f"Film {i+1}: Missing fields: {', '.join(sorted(missing_fields))}")
                     continue
                 
-                # Set default values for optional fields
-                timeslot = film.get('timeslot', 'All Day')
-                rating = film.get('rating', 7)
-                
-                # Validate data types
-                if not isinstance(film['year'], int) or film['year'] < 1900 or film['year'] > 2024:
+                # Match genres case-insensitively and store the canonical name
+                genre = _GENRE_ALIASES.get(film['genre'].strip().lower()) if isinstance(film['genre'], str) else None
+                if genre is None:
                     error_count += 1
-                    errors.append(f"Film {i+1} ({film.get('title', 'Unknown')}): Invalid year")
+                    errors.append(f"Film {i+1} ({film.get('title', 'Unknown')}): Invalid genre '{film['genre']}'")
                     continue
+                film = {**film, 'genre': genre}
                 
-                if not isinstance(rating, (int, float)) or rating < 1 or rating > 10:
+                # Validate data types and ranges (optional fields get their defaults)
+                try:
+                    film = msgspec.convert(film, type=Film)
+                except msgspec.ValidationError as e:
                     error_count += 1
-                    errors.append(f"Film {i+1} ({film.get('title', 'Unknown')}): Invalid rating (must be 1-10)")
+                    errors.append(f"Film {i+1} ({film.get('title', 'Unknown')}): {str(e)}")
                     continue
                 
-                # Add film to database
-                if add_film_to_db(collection, film['title'], film['genre'], 
-                                film['director'], film['year'], film['description'], 
-                                timeslot, rating):
-                    success_count += 1
-                else:
-                    error_count += 1
-                    errors.append(f"Film {i+1} ({film.get('title', 'Unknown')}): Database error")
+                # Queue film for a single batched insert
+                film_text, film_data, film_id = build_film_record(
+                    film.title, film.genre, film.director, film.year,
+                    film.description, film.timeslot, film.rating, id_prefix=f"{batch_base}_{i}"
+                )
+                docs.append(film_text)
+                metas.append(film_data)
+                ids.append(film_id)
                     
             except Exception as e:
                 error_count += 1
                 errors.append(f"Film {i+1}: {str(e)}")
         
+        if progress is not None:
+            progress["done"], progress["total"] = 0, len(docs)
+        
+        # Add valid films in sub-batches: each is still one batched embedding call,
+        # and progress advances as each one is saved
+        success_count = 0
+        for start in range(0, len(docs), IMPORT_BATCH_SIZE):
+            end = start + IMPORT_BATCH_SIZE
+            try:
+                collection.add(documents=docs[start:end], metadatas=metas[start:end], ids=ids[start:end])
+                success_count += len(ids[start:end])
+            except Exception as e:
+                error_count += len(ids[start:end])
+                errors.append(f"Database error while adding films {start+1}-{start+len(ids[start:end])}: {str(e)}")
+            
+            if progress is not None:
+                progress["done"] = start + len(ids[start:end])
+        
         return True, f"Successfully imported {success_count} films. {error_count} errors." + (f"\n\nErrors:\n" + "\n".join(errors) if errors else "")
         
-    except json.JSONDecodeError as e:
+    except msgspec.DecodeError as e:
         return False, f"Invalid JSON format: {str(e)}"
     except Exception as e:
         return False, f"Error importing films: {str(e)}"
 
+@st.cache_data(ttl=3600, max_entries=1024, show_spinner=False)
+def _search_films_cached(query_norm, n_results, version, where=None):
+    """Run a ChromaDB query; `version` is the collection count so new films invalidate old results"""
+    _, collection = init_chromadb()
+    return collection.query(
+        query_texts=[query_norm],
+        n_results=n_results,
+        where=where
+    )
+
+# Structured terms recognised in chat queries
+_GENRE_PATTERN = re.compile(r"\b(" + "|".join(re.escape(alias) for alias in _GENRE_ALIASES) + r")\b")
+_YEAR_PATTERN = re.compile(r"\b(after|since|from|in|before)\s+((?:19|20)\d{2})\b")
+_NEGATION_WORDS = frozenset({
+    "not", "no", "don't", "dont", "without", "but", "except", "other than", "avoid"
+})
+_NEGATION_PATTERN = re.compile(r"\b(?:" + "|".join(re.escape(w) for w in _NEGATION_WORDS) + r")\b")
+# A negation only applies up to the next comma/punctuation or conjunction
+_CLAUSE_BREAK_PATTERN = re.compile(r"[,;.!?]|\b(?:and|or)\b")
+_RATING_PATTERN = re.compile(r"\brating\s*(>=|>|above|over|at least)\s*(\d+(?:\.\d+)?)")
+
+def _parse_query_filters(query):
+    """Split a normalized query into free text and a ChromaDB `where` filter (None if no structured terms)"""
+    conditions = []
+    
+    genres = []
+    for match in _GENRE_PATTERN.finditer(query):
+        # Skip excluded genres ("i don't want horror", "anything but romance"),
+        # looking back only to the start of the current clause
+        preceding = query[:match.start()]
+        clause_start = max((m.end() for m in _CLAUSE_BREAK_PATTERN.finditer(preceding)), default=0)
+        if _NEGATION_PATTERN.search(preceding, clause_start):
+            continue
+        
+        genre = _GENRE_ALIASES[match.group(1)]
+        if genre not in genres:
+            genres.append(genre)
+    if len(genres) == 1:
+        conditions.append({"genre": genres[0]})
+    elif genres:
+        conditions.append({"genre": {"$in": genres}})
+    
+    # Only qualified years become filters, so titles like "2001 a space odyssey" stay free text;
+    # the year is left in the query text either way
+    year_matches = _YEAR_PATTERN.findall(query)
+    if len(year_matches) == 1:
+        qualifier, year = year_matches[0][0], int(year_matches[0][1])
+        if qualifier == "before":
+            conditions.append({"year": {"$lt": year}})
+        elif qualifier in ("after", "since"):
+            conditions.append({"year": {"$gte": year}})
+        else:
+            conditions.append({"year": year})
+    elif year_matches and all(qualifier in ("from", "in") for qualifier, _ in year_matches):
+        # "in 2019 or in 2020": any of the exact years; mixed ranges are left to the vector search
+        conditions.append({"year": {"$in": sorted({int(year) for _, year in year_matches})}})
+    
+    rating_match = _RATING_PATTERN.search(query)
+    if rating_match:
+        operator = "$gt" if rating_match.group(1) in (">", "above", "over") else "$gte"
+        conditions.append({"rating": {operator: float(rating_match.group(2))}})
+        query = query.replace(rating_match.group(0), " ")
+    
+    if not conditions:
+        return query, None
+    
+    where = conditions[0] if len(conditions) == 1 else {"$and": conditions}
+    return " ".join(query.split()), where
+
+@st.cache_data(show_spinner=False)
+def _read_example_json(path, mtime):
+    """Read the example JSON file; `mtime` is only part of the cache key"""
+    with open(path, "r") as f:
+        return f.read()
+
+def load_example_json(path="example_films.json"):
+    """Return the example JSON contents, or None if the file is missing"""
+    try:
+        return _read_example_json(path, os.path.getmtime(path))
+    except FileNotFoundError:
+        return None
+
+def decode_uploaded_json(uploaded_file):
+    """Decode an uploaded JSON file, reusing the result while the same upload stays selected"""
+    key = (getattr(uploaded_file, "file_id", None), uploaded_file.name, uploaded_file.size)
+    cached = st.session_state.get("uploaded_json")
+    if cached is None or cached[0] != key:
+        cached = (key, decode_json(uploaded_file.getvalue()))
+        st.session_state.uploaded_json = cached
+    return cached[1]
+
+@st.cache_resource
+def _get_executor():
+    """Shared worker pool for background JSON imports"""
+    return ThreadPoolExecutor(max_workers=2)
+
 def search_films(collection, query, n_results=5):
     """Search films in ChromaDB"""
     try:
-        results = collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
-        return results
+        query_norm = " ".join(query.lower().split())
+        version = collection.count()
+        
+        # Narrow the vector search with metadata filters when the query names a genre, year or rating
+        query_text, where = _parse_query_filters(query_norm)
+        if where:
+            try:
+                results = _search_films_cached(query_text or query_norm, n_results, version, where)
+                if results['documents'][0]:
+                    return results
+            except Exception:
+                # Fall back to the plain vector search below
+                pass
+        
+        return _search_films_cached(query_norm, n_results, version)
     except Exception as e:
         st.error(f"Error searching films: {str(e)}")
         return None
 
-def get_ai_recommendation(client, deployment_name, query, search_results):
-    """Get AI recommendation based on search results"""
+async def get_ai_recommendation(deployment_name, query, search_results, history=None, summary=None):
+    """Stream an AI recommendation based on search results, yielding text chunks
+
+    `history` holds the recent chat turns and `summary` condenses anything older (see _summarize_if_needed).
+    The async client is opened and closed here, on the event loop that drives this generator.
+    """
+    from openai import AsyncAzureOpenAI
+    
     if not search_results or not search_results['documents'][0]:
-        return "I couldn't find any films matching your criteria. Please try a different search."
+        yield "I couldn't find any films matching your criteria. Please try a different search."
+        return
     
     # Prepare context from search results
-    context = ""
-    for i, (doc, metadata) in enumerate(zip(search_results['documents'][0], search_results['metadatas'][0])):
-        context += f"Film {i+1}: {metadata['title']} ({metadata['year']}) - {metadata['genre']}\n"
-        context += f"Director: {metadata['director']}\n"
-        context += f"Description: {metadata['description']}\n"
-        context += f"Rating: {metadata['rating']}/10\n"
-        context += f"Available timeslot: {metadata['timeslot']}\n\n"
+    context = "\n\n".join(
+        f"Film {i+1}: {metadata['title']} ({metadata['year']}) - {metadata['genre']}\n"
+        f"Director: {metadata['director']}\n"
+        f"Description: {metadata['description']}\n"
+        f"Rating: {metadata['rating']}/10\n"
+        f"Available timeslot: {metadata['timeslot']}"
+        for i, metadata in enumerate(search_results['metadatas'][0])
+    )
+    
+    system_prompt = "You are a helpful film recommendation assistant. Based on the user's query and the available films, provide personalized recommendations with explanations."
+    if summary:
+        system_prompt += f"\n\nSummary of the conversation so far:\n{summary}"
     
     try:
-        response = client.chat.completions.create(
+        async with AsyncAzureOpenAI(**azure_openai_client_kwargs()) as client:
+            stream = await client.chat.completions.create(
+                model=deployment_name,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": system_prompt
+                    },
+                    *(history or []),
+                    {
+                        "role": "user",
+                        "content": f"User query: {query}\n\nAvailable films:\n{context}\n\nPlease recommend the most suitable films and explain why they match the user's preferences."
+                    }
+                ],
+                max_tokens=500,
+                temperature=0.7,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    except Exception as e:
+        yield f"Error getting AI recommendation: {str(e)}"
+
+@st.cache_resource(show_spinner=False)
+def _get_token_encoding():
+    """Load the tiktoken encoding, or None if it is unavailable
+
+    tiktoken downloads its BPE file on first use, which fails (or hangs) on offline hosts;
+    returning None instead of raising lets cache_resource remember the failure.
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+def _count_tokens(text):
+    """Count tokens with tiktoken, estimating ~4 characters per token if it is unavailable"""
+    encoding = _get_token_encoding()
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text))
+
+def _summarize_if_needed(azure_client, deployment_name, messages, summary=""):
+    """Fold older chat turns into a rolling summary once the LLM context gets long
+
+    Returns (summary, messages); when a summary is made, messages keeps only the last two turns.
+    """
+    token_count = _count_tokens(summary) + sum(_count_tokens(m["content"]) for m in messages)
+    if token_count <= SUMMARY_TOKEN_THRESHOLD or len(messages) <= SUMMARY_KEEP_MESSAGES:
+        return summary, messages
+    
+    older, recent = messages[:-SUMMARY_KEEP_MESSAGES], messages[-SUMMARY_KEEP_MESSAGES:]
+    transcript = "\n\n".join(f"{m['role']}: {m['content']}" for m in older)
+    if summary:
+        transcript = f"Earlier summary:\n{summary}\n\n{transcript}"
+    
+    try:
+        response = azure_client.chat.completions.create(
             model=deployment_name,
             messages=[
                 {
                     "role": "system",
-                    "content": "You are a helpful film recommendation assistant. Based on the user's query and the available films, provide personalized recommendations with explanations."
+                    "content": "Summarize the conversation so far in a few sentences. Keep the user's stated preferences and the films already recommended."
                 },
                 {
                     "role": "user",
-                    "content": f"User query: {query}\n\nAvailable films:\n{context}\n\nPlease recommend the most suitable films and explain why they match the user's preferences."
+                    "content": transcript
                 }
             ],
-            max_tokens=500,
-            temperature=0.7
+            max_tokens=300,
+            temperature=0.3
         )
-        return response.choices[0].message.content
+        return response.choices[0].message.content, recent
     except Exception as e:
-        return f"Error getting AI recommendation: {str(e)}"
+        st.warning(f"Could not summarize the conversation: {str(e)}")
+        return summary, messages
+
+def iter_async(async_gen):
+    """Drive an async generator from synchronous code (e.g. st.write_stream)"""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(async_gen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(async_gen.aclose())
+        loop.close()
 
 def main():
+    _bootstrap()
+    
     st.set_page_config(
         page_title="Film Recommendation Chatbot",
         page_icon="🎬",
@@ -304,7 +692,6 @@ def main():
     
     # Initialize databases
     client, collection = init_chromadb()
-    azure_client, deployment_name = init_azure_openai()
     
     # Sidebar for navigation
     st.sidebar.title("Navigation")
@@ -322,11 +709,7 @@ def main():
                 
                 with col1:
                     title = st.text_input("Film Title*", placeholder="e.g., The Shawshank Redemption")
-                    genre = st.selectbox("Genre*", [
-                        "Action", "Adventure", "Animation", "Comedy", "Crime", 
-                        "Documentary", "Drama", "Family", "Fantasy", "Horror", 
-                        "Musical", "Mystery", "Romance", "Sci-Fi", "Thriller", "War", "Western"
-                    ])
+                    genre = st.selectbox("Genre*", FILM_GENRES)
                     director = st.text_input("Director*", placeholder="e.g., Frank Darabont")
                     year = st.number_input("Release Year*", min_value=1900, max_value=2024, value=2023)
                 
@@ -358,9 +741,8 @@ def main():
                 st.info("💡 **How to use:**\n1. Download the example JSON file\n2. Edit it with your films\n3. Upload the modified file")
             
             with col2:
-                try:
-                    with open("example_films.json", "r") as f:
-                        example_json = f.read()
+                example_json = load_example_json()
+                if example_json is not None:
                     st.download_button(
                         label="📥 Download Example JSON",
                         data=example_json,
@@ -368,7 +750,7 @@ def main():
                         mime="application/json",
                         help="Download this template and modify it with your films"
                     )
-                except FileNotFoundError:
+                else:
                     st.warning("Example JSON file not found")
             
             # File uploader
@@ -378,35 +760,37 @@ def main():
                 help="Upload a JSON file containing an array of film objects"
             )
             
+            if "import_jobs" not in st.session_state:
+                st.session_state.import_jobs = []
+            
             if uploaded_file is not None:
                 try:
-                    # Read the uploaded file
-                    json_data = json.load(uploaded_file)
+                    # Read the uploaded file (decoded once per upload, not on every status-polling rerun)
+                    json_data = decode_uploaded_json(uploaded_file)
                     
                     # Preview the data
                     st.subheader("📋 Preview")
                     st.write(f"Found {len(json_data)} films in the uploaded file:")
                     
                     # Show first few films as preview
-                    preview_df = pd.DataFrame(json_data[:3])  # Show first 3 films
-                    st.dataframe(preview_df, use_container_width=True)
+                    st.dataframe(film_rows(json_data[:3]), use_container_width=True)  # Show first 3 films
                     
                     if len(json_data) > 3:
                         st.write(f"... and {len(json_data) - 3} more films")
                     
-                    # Import button
+                    # Import button (queued on the background pool so further files can be uploaded meanwhile)
                     if st.button("🚀 Import All Films", type="primary"):
-                        with st.spinner("Importing films..."):
-                            success, message = import_films_from_json(collection, json_data)
-                            
-                            if success:
-                                st.success(message)
-                                if "Successfully imported" in message and "0 errors" in message:
-                                    st.balloons()
-                            else:
-                                st.error(message)
+                        progress = {"done": 0, "total": 0}
+                        st.session_state.import_jobs.append({
+                            "name": uploaded_file.name,
+                            "progress": progress,
+                            "future": _get_executor().submit(
+                                import_films_from_json, collection, json_data, progress
+                            )
+                        })
+                        st.rerun()
                                 
-                except json.JSONDecodeError as e:
+                except msgspec.DecodeError as e:
                     st.error(f"❌ Invalid JSON file: {str(e)}")
                 except Exception as e:
                     st.error(f"❌ Error reading file: {str(e)}")
@@ -416,7 +800,7 @@ def main():
                 st.markdown("""
                 **Required fields for each film:**
                 - `title` (string): Film title
-                - `genre` (string): Film genre
+                - `genre` (string): Film genre (one of the genres in the "Add Single Film" form, e.g. "Drama", "Sci-Fi")
                 - `director` (string): Director name
                 - `year` (integer): Release year (1900-2024)
                 - `description` (string): Film description
@@ -440,6 +824,38 @@ def main():
                 ]
                 ```
                 """)
+            
+            # Background import status, one entry per submitted file
+            imports_pending = False
+            for job in list(st.session_state.import_jobs):
+                if job["future"].done():
+                    st.session_state.import_jobs.remove(job)
+                    try:
+                        success, message = job["future"].result()
+                    except Exception as e:
+                        success, message = False, f"Error importing films: {str(e)}"
+                    
+                    if success:
+                        st.success(f"{job['name']}: {message}")
+                        if "Successfully imported" in message and "0 errors" in message:
+                            st.balloons()
+                    else:
+                        st.error(f"{job['name']}: {message}")
+                else:
+                    imports_pending = True
+                    done, total = job["progress"]["done"], job["progress"]["total"]
+                    with st.status(f"Importing {job['name']}...", expanded=True):
+                        if not job["future"].running():
+                            st.progress(0.0, text="Queued")
+                        elif total:
+                            st.progress(done / total, text=f"Saving films: {done}/{total}")
+                        else:
+                            st.progress(0.0, text="Validating films...")
+            
+            if imports_pending:
+                # Poll until the workers finish
+                time.sleep(0.5)
+                st.rerun()
     
     elif page == "Chat & Recommendations":
         # Header with New Chat button
@@ -448,16 +864,24 @@ def main():
             st.header("💬 Chat & Get Recommendations")
         with col2:
             if st.button("🆕 New Chat", help="Start a new conversation"):
-                st.session_state.messages = []
+                st.session_state.messages = deque(maxlen=MAX_HISTORY_MESSAGES)
+                st.session_state.chat_context = []
+                st.session_state.chat_summary = ""
                 st.rerun()
         
+        azure_client, deployment_name = init_azure_openai()
         if not azure_client:
             st.warning("Azure OpenAI is not configured. Please add your Azure OpenAI configuration to the .env file.")
             return
         
         # Chat interface
         if "messages" not in st.session_state:
-            st.session_state.messages = []
+            st.session_state.messages = deque(maxlen=MAX_HISTORY_MESSAGES)
+        
+        # What the LLM sees: a rolling summary plus recent turns, kept apart from the displayed history
+        if "chat_context" not in st.session_state:
+            st.session_state.chat_context = []
+            st.session_state.chat_summary = ""
         
         # Show chat status
         if len(st.session_state.messages) == 0:
@@ -465,50 +889,90 @@ def main():
         else:
             st.caption(f"💬 Current conversation has {len(st.session_state.messages)} messages")
         
-        # Display chat messages
-        for i, message in enumerate(st.session_state.messages):
+        # Display chat messages; older ones are collapsed to keep reruns cheap
+        history = list(st.session_state.messages)
+        older_count = max(len(history) - VISIBLE_MESSAGES, 0)
+        
+        if older_count:
+            with st.expander(f"Earlier in this conversation ({older_count} messages)", expanded=False):
+                for message in history[:older_count]:
+                    with st.chat_message(message["role"]):
+                        st.markdown(message["content"])
+        
+        for message in history[older_count:]:
             with st.chat_message(message["role"]):
                 st.markdown(message["content"])
                 
                 # Add TTS component for assistant messages
                 if message["role"] == "assistant":
                     with st.expander("🔊 Text-to-Speech Options", expanded=False):
-                        create_tts_component(message["content"], f"msg_{i}")
+                        create_tts_component(message["content"], f"msg_{message.get('id', id(message))}")
         
         # Chat input
         if prompt := st.chat_input("What kind of film are you looking for?"):
             # Add user message to chat history
-            st.session_state.messages.append({"role": "user", "content": prompt})
+            st.session_state.messages.append({"role": "user", "content": prompt, "id": uuid.uuid4().hex})
             with st.chat_message("user"):
                 st.markdown(prompt)
             
             # Search for films and get AI recommendation
             with st.chat_message("assistant"):
-                with st.spinner("Searching for films and generating recommendations..."):
+                with st.spinner("Searching for films..."):
                     search_results = search_films(collection, prompt)
-                    recommendation = get_ai_recommendation(azure_client, deployment_name, prompt, search_results)
-                    st.markdown(recommendation)
-                    
-                    # Add TTS component for the new response
-                    current_msg_index = len(st.session_state.messages)
-                    with st.expander("🔊 Text-to-Speech Options", expanded=False):
-                        create_tts_component(recommendation, f"msg_{current_msg_index}")
+                
+                # Stream tokens as they arrive; write_stream returns the full text
+                recommendation = st.write_stream(iter_async(
+                    get_ai_recommendation(
+                        deployment_name, prompt, search_results,
+                        history=st.session_state.chat_context,
+                        summary=st.session_state.chat_summary
+                    )
+                ))
+                
+                # Add TTS component for the new response (keyed by a stable message id, not its position)
+                message_id = uuid.uuid4().hex
+                with st.expander("🔊 Text-to-Speech Options", expanded=False):
+                    create_tts_component(recommendation, f"msg_{message_id}")
             
             # Add assistant response to chat history
-            st.session_state.messages.append({"role": "assistant", "content": recommendation})
+            st.session_state.messages.append({"role": "assistant", "content": recommendation, "id": message_id})
+            
+            # Update the LLM context, condensing older turns if it has grown too long
+            st.session_state.chat_context += [
+                {"role": "user", "content": prompt},
+                {"role": "assistant", "content": recommendation}
+            ]
+            with st.spinner("Condensing the conversation..."):
+                st.session_state.chat_summary, st.session_state.chat_context = _summarize_if_needed(
+                    azure_client, deployment_name, st.session_state.chat_context, st.session_state.chat_summary
+                )
     
     elif page == "View All Films":
         st.header("📚 All Films in Database")
         
         try:
-            # Get all films from ChromaDB
-            all_films = collection.get()
+            total = collection.count()
             
-            if all_films['metadatas']:
-                films_df = pd.DataFrame(all_films['metadatas'])
-                st.dataframe(films_df, use_container_width=True)
+            if total:
+                page_count = math.ceil(total / PAGE_SIZE)
+                page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1)
+                
+                # Fetch one page of films (only metadata is displayed, so skip embeddings/documents)
+                films_page = collection.get(
+                    limit=PAGE_SIZE,
+                    offset=(page_number - 1) * PAGE_SIZE,
+                    include=["metadatas"]
+                )
+                st.dataframe(
+                    film_rows(films_page['metadatas']),
+                    use_container_width=True,
+                    column_config={
+                        "year": st.column_config.NumberColumn("year", format="%d"),
+                        "rating": st.column_config.NumberColumn("rating", format="%.1f")
+                    }
+                )
                 
-                st.info(f"Total films in database: {len(films_df)}")
+                st.info(f"Total films in database: {total} (page {page_number} of {page_count})")
             else:
                 st.info("No films in the database yet. Add some films using the 'Add Films' page!")
         except Exception as e: